@@ -1,12 +1,13 @@
 import os
 import shutil
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, WebSocket, BackgroundTasks, Query
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
+from typing import Optional
 import sys
-import json
 from moviepy.editor import VideoFileClip
 
 # Add music_recognition to path
@@ -25,15 +26,21 @@ TRANSCRIPT_DIR.mkdir(exist_ok=True)
 
 from fingerprint import generate_fingerprints
 from database import FingerprintDB
-from streaming import websocket_endpoint
+from streaming import websocket_endpoint, warmup
 
 # Video Recognition Imports
 from transcribe import transcribe_videos
 from indexer import create_search_index
-from search import search as search_video_index
+from search import search_results as search_video_index
 
 # --- FastAPI App Initialization ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pay the fingerprinting cold-start cost before the first client connects
+    warmup()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # --- CORS Middleware ---
 # This allows our frontend (running on localhost:3000) to communicate with our backend.
@@ -240,15 +247,15 @@ async def upload_video(background_tasks: BackgroundTasks, video_file: UploadFile
         video_file.file.close()
 
 @app.get("/search_video")
-def search_video(query: str, top_k: int = 5, min_score: float = 0.0):
+def search_video(query: str, top_k: int = 5, min_score: float = 0.0, video: Optional[str] = None, rerank: bool = False):
     """
     Semantic search for video content.
+    Optionally restricted to videos whose name contains `video`,
+    and re-ranked with a cross-encoder when `rerank` is set.
     """
     try:
-        # search_video_index returns a JSON string, so we parse it back to a dict
-        # to let FastAPI serialize it cleanly
-        results_json = search_video_index(query, top_k=top_k, min_score=min_score)
-        return json.loads(results_json)
+        # search_video_index returns a dict, which FastAPI serializes directly
+        return search_video_index(query, top_k=top_k, video_filter=video, min_score=min_score, rerank=rerank)
     except Exception as e:
         return JSONResponse(status_code=500, content={"message": f"Search failed: {str(e)}"})
 
@@ -71,36 +71,38 @@ class FingerprintDB:
             
             # Step 3: Calculate delta_t for each time pair
             # delta_t = db_time - sample_time (should be constant for matches)
-            deltas = np.array([db_t - sample_t for sample_t, db_t in pairs])
+            pairs = np.array(pairs)
+            deltas = pairs[:, 1] - pairs[:, 0]
             
             # Step 4: Find the largest cluster using histogram
             # Sort deltas for efficient cluster detection
             sorted_deltas = np.sort(deltas)
             
+            # For every start position, find where its run of deltas within
+            # CLUSTER_TOLERANCE ends. The deltas are sorted, so each run is
+            # contiguous and one vectorized binary search replaces the
+            # element-by-element inner scan.
+            run_ends = np.searchsorted(
+                sorted_deltas, sorted_deltas + CLUSTER_TOLERANCE, side='right'
+            ).tolist()
+            
             # Find largest cluster of similar delta values
             best_cluster_size = 0
             best_offset = 0
             
             i = 0
-            while i < len(sorted_deltas):
+            while i < len(run_ends):
                 # Count consecutive deltas within tolerance
-                current_delta = sorted_deltas[i]
-                cluster_size = 1
-                j = i + 1
-                
-                while j < len(sorted_deltas):
-                    if abs(sorted_deltas[j] - current_delta) <= CLUSTER_TOLERANCE:
-                        cluster_size += 1
-                        j += 1
-                    else:
-                        break
+                j = run_ends[i]
+                cluster_size = j - i
                 
                 # Update best cluster if this is larger
                 if cluster_size > best_cluster_size:
                     best_cluster_size = cluster_size
-                    best_offset = int(current_delta)
+                    best_offset = int(sorted_deltas[i])
                 
-                i = j if j > i + 1 else i + 1
+                # Continue after this cluster (j > i: a run includes its start)
+                i = j
             
             # Only add if cluster meets threshold
             if best_cluster_size >= threshold:
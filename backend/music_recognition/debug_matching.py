@@ -11,9 +11,10 @@ This will:
 4. Suggest parameter adjustments
 """
 
+import os
 import sys
 import numpy as np
-from fingerprint import generate_fingerprints, _generate_fingerprints_from_array
+from fingerprint import _generate_fingerprints_from_array, SAMPLE_RATE
 from database import FingerprintDB
 import librosa
 
@@ -63,14 +64,14 @@ def compare_fingerprints(original_fps, captured_fps):
         orig_times = {h: t for h, (_, t) in original_fps}
         capt_times = {h: t for h, (_, t) in captured_fps}
         
-        time_diffs = []
-        for h in common_hashes:
-            if h in orig_times and h in capt_times:
-                diff = orig_times[h] - capt_times[h]
-                time_diffs.append(diff)
+        # Every common hash is in both dicts, so fill a preallocated array
+        # directly instead of boxing each difference into a Python list
+        time_diffs = np.fromiter(
+            (orig_times[h] - capt_times[h] for h in common_hashes),
+            dtype=np.int64, count=len(common_hashes)
+        )
         
-        if time_diffs:
-            time_diffs = np.array(time_diffs)
+        if time_diffs.size:
             print(f"\nTime offset analysis:")
             print(f"  Mean offset: {np.mean(time_diffs):.1f} frames")
             print(f"  Std deviation: {np.std(time_diffs):.1f} frames")
@@ -98,12 +99,17 @@ def analyze_audio(file_path, label="Audio"):
     print(f"Sample rate: {sr} Hz")
     print(f"Duration: {len(y) / sr:.2f} seconds")
     print(f"Samples: {len(y)}")
-    print(f"Max amplitude: {np.max(np.abs(y)):.4f}")
-    print(f"RMS energy: {np.sqrt(np.mean(y**2)):.4f}")
+    
+    # |y| is computed once and shared by the peak and silence checks; RMS
+    # uses a dot product, which sums the squares without a temporary array
+    abs_y = np.abs(y)
+    max_amplitude = abs_y.max()
+    print(f"Max amplitude: {max_amplitude:.4f}")
+    print(f"RMS energy: {np.sqrt(np.dot(y, y) / len(y)):.4f}")
     
     # Check for silence
     silence_threshold = 0.01
-    silent_samples = np.sum(np.abs(y) < silence_threshold)
+    silent_samples = np.count_nonzero(abs_y < silence_threshold)
     silence_pct = silent_samples / len(y) * 100
     print(f"Silent samples: {silence_pct:.1f}%")
     
@@ -111,7 +117,7 @@ def analyze_audio(file_path, label="Audio"):
         print("⚠️  WARNING: More than 50% silence detected!")
     
     # Check dynamic range
-    if np.max(np.abs(y)) < 0.1:
+    if max_amplitude < 0.1:
         print("⚠️  WARNING: Very quiet audio (max amplitude < 0.1)")
         print("   Consider increasing recording volume")
     
@@ -121,6 +127,9 @@ def analyze_audio(file_path, label="Audio"):
 def test_matching(original_file, captured_file):
     """
     Full end-to-end matching test.
+
+    Returns:
+        (success, original_fingerprints, captured_fingerprints)
     """
     print("\n" + "="*60)
     print("REAL-WORLD MATCHING TEST")
@@ -131,15 +140,23 @@ def test_matching(original_file, captured_file):
     capt_audio, capt_sr = analyze_audio(captured_file, "CAPTURED")
     
     # Generate fingerprints
+    # Reuse the decoded audio (resampled to the fingerprint rate) rather
+    # than having generate_fingerprints() decode each file again
     print("\n" + "="*60)
     print("GENERATING FINGERPRINTS")
     print("="*60)
     
     print("\n1. Original file fingerprinting...")
-    orig_fps = generate_fingerprints(original_file)
+    orig_fps = _generate_fingerprints_from_array(
+        librosa.resample(orig_audio, orig_sr=orig_sr, target_sr=SAMPLE_RATE),
+        os.path.basename(original_file)
+    )
     
     print("\n2. Captured file fingerprinting...")
-    capt_fps = generate_fingerprints(captured_file)
+    capt_fps = _generate_fingerprints_from_array(
+        librosa.resample(capt_audio, orig_sr=capt_sr, target_sr=SAMPLE_RATE),
+        os.path.basename(captured_file)
+    )
     
     # Compare fingerprints
     has_overlap = compare_fingerprints(orig_fps, capt_fps)
@@ -169,20 +186,40 @@ def test_matching(original_file, captured_file):
         print("3. Increase CLUSTER_TOLERANCE to 10 or 20")
         print("4. Verify audio quality (volume, noise, duration)")
     
-    return matches is not None and len(matches) > 0
+    success = matches is not None and len(matches) > 0
+    return success, orig_fps, capt_fps
 
 
-def simulate_capture(audio_file, noise_level=0.05, volume=0.7):
+def load_original(audio_file):
+    """
+    Load a song at the fingerprint sample rate and fingerprint it.
+
+    Returns:
+        (audio, fingerprints) - reusable across several simulate_capture() runs
+    """
+    print(f"\nLoading: {audio_file}")
+    y, sr = librosa.load(audio_file, sr=SAMPLE_RATE, mono=True)
+    
+    print("\nOriginal fingerprints...")
+    orig_fps = _generate_fingerprints_from_array(y, audio_file)
+    
+    return y, orig_fps
+
+
+def simulate_capture(audio_file, noise_level=0.05, volume=0.7, seed=None, original=None):
     """
     Simulate microphone capture by adding noise and volume variation.
     Useful for testing without actual recording equipment.
+
+    Pass a seed to get the same noise realization on every run, and the
+    result of load_original() as `original` to skip reloading and
+    re-fingerprinting the clean song on every call.
     """
     print("\n" + "="*60)
     print("SIMULATED CAPTURE TEST")
     print("="*60)
     
-    print(f"\nLoading: {audio_file}")
-    y, sr = librosa.load(audio_file, sr=8000, mono=True)
+    y, orig_fps = original if original is not None else load_original(audio_file)
     
     # Simulate capture effects
     print(f"Applying capture simulation:")
@@ -193,16 +230,16 @@ def simulate_capture(audio_file, noise_level=0.05, volume=0.7):
     y_captured = y * volume
     
     # Add white noise
-    noise = np.random.randn(len(y)) * noise_level
+    # Drawn in float32 from a local generator: no float64 buffer, and no
+    # global RNG state shared with anything else
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal(len(y), dtype=np.float32) * np.float32(noise_level)
     y_captured = y_captured + noise
     
     # Clip to [-1, 1]
     y_captured = np.clip(y_captured, -1, 1)
     
-    # Generate fingerprints for both
-    print("\nOriginal fingerprints...")
-    orig_fps = _generate_fingerprints_from_array(y, audio_file)
-    
+    # Only the captured version changes between runs
     print("\nCaptured fingerprints...")
     capt_fps = _generate_fingerprints_from_array(y_captured, "captured")
     
@@ -286,12 +323,15 @@ if __name__ == '__main__':
         print("Running in SIMULATION mode")
         audio_file = sys.argv[1]
         
+        # The clean song is loaded and fingerprinted once for all noise levels
+        original = load_original(audio_file)
+        
         # Test with different noise levels
         for noise in [0.01, 0.05, 0.1]:
             print(f"\n{'='*60}")
             print(f"Testing with noise level: {noise}")
             print(f"{'='*60}")
-            success = simulate_capture(audio_file, noise_level=noise, volume=0.7)
+            success = simulate_capture(audio_file, noise_level=noise, volume=0.7, original=original)
             
             if not success:
                 print(f"\n⚠️  Failed at noise level {noise}")
@@ -303,11 +343,8 @@ if __name__ == '__main__':
         original = sys.argv[1]
         captured = sys.argv[2]
         
-        success = test_matching(original, captured)
-        
-        # Load both for parameter suggestions
-        orig_fps = generate_fingerprints(original)
-        capt_fps = generate_fingerprints(captured)
+        # Fingerprints from the matching test are reused for the suggestions
+        success, orig_fps, capt_fps = test_matching(original, captured)
         suggest_parameters(orig_fps, capt_fps)
         
         if success:
@@ -41,6 +41,10 @@ FREQ_WINDOW = 2000      # DOUBLED - allows more freq variation
 MIN_FREQ_HZ = 300      # Ignore low rumble and bass (often distorted)
 MAX_FREQ_HZ = 4000     # Nyquist at 8KHz is 4000Hz
 
+# High-pass filter removing low-frequency rumble before fingerprinting.
+# Designed once at import; float32 coefficients keep sosfilt in float32.
+HIGHPASS_SOS = butter(4, MIN_FREQ_HZ, 'hp', fs=SAMPLE_RATE, output='sos').astype(np.float32)
+
 
 def generate_fingerprints(file_path: str):
     """
@@ -112,14 +116,17 @@ def _preprocess_audio(y: np.ndarray):
     3. Pre-emphasis (boost high frequencies)
     4. Noise gate (remove very quiet sections)
     """
+    # Work in float32 throughout: fingerprinting has no need for float64
+    # precision, and float64 would double the memory traffic of every step
+    y = np.asarray(y, dtype=np.float32)
+    
     # 1. Normalize to [-1, 1] range
     if np.max(np.abs(y)) > 0:
         y = y / np.max(np.abs(y))
     
     # 2. High-pass filter at 300Hz to remove low-frequency noise
     # Room rumble, AC hum, and bass are often distorted in capture
-    sos = butter(4, 300, 'hp', fs=SAMPLE_RATE, output='sos')
-    y = sosfilt(sos, y)
+    y = sosfilt(HIGHPASS_SOS, y)
     
     # 3. Pre-emphasis filter to boost high frequencies
     # High frequencies contain more distinctive features
@@ -215,16 +222,20 @@ def _extract_constellation_map(spectrogram: np.ndarray):
     # Create array of peaks with their properties
     peaks_data = np.column_stack((time_idx, freq_idx, peak_amplitudes))
     
-    # Sort by amplitude (descending) to prioritize strongest peaks
-    peaks_data = peaks_data[peaks_data[:, 2].argsort()[::-1]]
-    
     # Apply density control - INCREASED for real-world
     duration = time_frames * FFT_HOP_LENGTH / SAMPLE_RATE
     target_num_peaks = int(TARGET_PEAK_DENSITY * duration)
-    
+
     # Take top N peaks by amplitude
-    if len(peaks_data) > target_num_peaks:
-        peaks_data = peaks_data[:target_num_peaks]
+    # argpartition selects them in O(n); only the survivors get sorted
+    if 0 < target_num_peaks < len(peaks_data):
+        top = np.argpartition(peaks_data[:, 2], -target_num_peaks)[-target_num_peaks:]
+        peaks_data = peaks_data[top]
+    elif target_num_peaks <= 0:
+        peaks_data = peaks_data[:0]
+
+    # Sort by amplitude (descending) to prioritize strongest peaks
+    peaks_data = peaks_data[peaks_data[:, 2].argsort()[::-1]]
     
     # Convert back to list of (time, freq) tuples
     # Adjust freq_idx to account for cropped frequency range
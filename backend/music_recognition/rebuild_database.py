@@ -11,8 +11,11 @@ Usage:
     python rebuild_database.py <music_directory>
 """
 
+import io
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
 from fingerprint import generate_fingerprints
 from database import FingerprintDB
@@ -23,16 +26,28 @@ SUPPORTED_FORMATS = {'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.wma'}
 def find_audio_files(directory):
     """
     Recursively find all audio files in directory.
-    """
-    audio_files = []
     
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if Path(file).suffix.lower() in SUPPORTED_FORMATS:
-                full_path = os.path.join(root, file)
-                audio_files.append(full_path)
+    Sorted so the processing order (and max_songs selection) is the same
+    on every run, independent of filesystem listing order.
+    """
+    return sorted(
+        str(path) for path in Path(directory).rglob('*')
+        if path.suffix.lower() in SUPPORTED_FORMATS and path.is_file()
+    )
+
+
+def fingerprint_song(audio_file):
+    """
+    Fingerprint one song in a worker process.
     
-    return audio_files
+    The worker's log output is captured and returned alongside the
+    fingerprints, so the parent can print it under the matching progress
+    line instead of interleaving output from several songs.
+    """
+    log = io.StringIO()
+    with redirect_stdout(log):
+        fingerprints = generate_fingerprints(audio_file)
+    return fingerprints, log.getvalue()
 
 
 def rebuild_database(music_dir, max_songs=None):
@@ -71,24 +86,34 @@ def rebuild_database(music_dir, max_songs=None):
     success_count = 0
     fail_count = 0
     
-    for i, audio_file in enumerate(audio_files, 1):
-        try:
-            print(f"\n[{i}/{len(audio_files)}] Processing: {os.path.basename(audio_file)}")
-            
-            # Generate fingerprints
-            fingerprints = generate_fingerprints(audio_file)
-            
-            if len(fingerprints) > 0:
-                # Add to database
-                db.add_song(audio_file, fingerprints)
-                success_count += 1
-            else:
-                print(f"  ⚠️  No fingerprints generated - skipping")
-                fail_count += 1
+    # Songs are fingerprinted independently, so spread them over worker
+    # processes; results are collected in order and added to the DB here
+    workers = min(len(audio_files), os.cpu_count() or 1)
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(fingerprint_song, audio_file) for audio_file in audio_files]
+        
+        for i, (audio_file, future) in enumerate(zip(audio_files, futures), 1):
+            try:
+                print(f"\n[{i}/{len(audio_files)}] Processing: {os.path.basename(audio_file)}")
                 
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-            fail_count += 1
+                # A failed worker (e.g. OOM-killed on a long file) raises
+                # here, so it is counted as a failure and the songs that
+                # were fingerprinted are still saved below
+                fingerprints, log = future.result()
+                print(log, end='')
+                
+                if len(fingerprints) > 0:
+                    # Add to database
+                    db.add_song(audio_file, fingerprints)
+                    success_count += 1
+                else:
+                    print(f"  ⚠️  No fingerprints generated - skipping")
+                    fail_count += 1
+                    
+            except Exception as e:
+                print(f"  ❌ Error: {e}")
+                fail_count += 1
     
     # Save database
     print("\n" + "="*60)
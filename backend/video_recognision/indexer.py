@@ -15,50 +15,61 @@ import re
 import json
 import numpy as np
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 import faiss
 from typing import List, Dict, Tuple
 
+# Share the sentence transformer with search.py: one model config, and a
+# single loaded instance when both run in the same process (the web backend)
+from search import get_model, MODEL_NAME
+
 # --- Configuration ---
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 TRANSCRIPT_DIR = BACKEND_DIR / "video_recognision" / "transcripts"
 INDEX_DIR = BACKEND_DIR / "video_recognision" / "search_index_v2"
-MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
 
 # Chunking parameters
 CHUNK_SIZE = 5  # Number of consecutive sentences to combine
 OVERLAP = 2     # Number of sentences to overlap between chunks
 MIN_CHUNK_LENGTH = 50  # Minimum characters per chunk
 
-# Regex to parse timestamp lines
-TIMESTAMP_PATTERN = re.compile(r"\[(\d{2}:\d{2}:\d{2}\.\d{3}) --> (\d{2}:\d{2}:\d{2}\.\d{3})\]\s*(.*)")
+# Embedding batch size (sentence-transformers sorts texts by length within
+# the call, so larger batches mean less padding waste per forward pass)
+ENCODE_BATCH_SIZE = 64
+
+# HNSW graph parameters (approximate nearest neighbour search)
+HNSW_M = 32                 # Neighbours per node in the graph
+HNSW_EF_CONSTRUCTION = 200  # Build-time search depth (higher = better recall)
+
+# Regex to parse timestamp lines (multiline: matched against the whole file)
+TIMESTAMP_PATTERN = re.compile(
+    r"^\[(\d{2}:\d{2}:\d{2}\.\d{3}) --> (\d{2}:\d{2}:\d{2}\.\d{3})\][ \t]*([^\n]*)",
+    re.MULTILINE
+)
 
 
 def timestamp_to_seconds(timestamp: str) -> float:
     """Convert HH:MM:SS.mmm to seconds."""
-    h, m, s = timestamp.split(':')
-    s, ms = s.split('.')
-    return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000
+    # Fixed-width format guaranteed by TIMESTAMP_PATTERN, so slice directly
+    return (int(timestamp[0:2]) * 3600 + int(timestamp[3:5]) * 60
+            + int(timestamp[6:8]) + int(timestamp[9:12]) / 1000)
 
 
 def parse_transcript(filepath: Path) -> List[Dict]:
     """Parse transcript file and return list of timestamped segments."""
+    data = filepath.read_text(encoding='utf-8')
     segments = []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line in f:
-            match = TIMESTAMP_PATTERN.match(line)
-            if match:
-                start, end, text = match.groups()
-                text = text.strip()
-                if text:
-                    segments.append({
-                        'start_time': start,
-                        'end_time': end,
-                        'start_seconds': timestamp_to_seconds(start),
-                        'end_seconds': timestamp_to_seconds(end),
-                        'text': text
-                    })
+    for match in TIMESTAMP_PATTERN.finditer(data):
+        start, end, text = match.groups()
+        text = text.strip()
+        if text:
+            segments.append({
+                'start_time': start,
+                'end_time': end,
+                'start_seconds': timestamp_to_seconds(start),
+                'end_seconds': timestamp_to_seconds(end),
+                'text': text
+            })
     return segments
 
 
@@ -112,6 +123,12 @@ def create_chunks(segments: List[Dict], video_name: str) -> List[Dict]:
     return chunks
 
 
+def process_transcript(transcript_filename: str) -> List[Dict]:
+    """Parse one transcript file and split it into chunks."""
+    segments = parse_transcript(TRANSCRIPT_DIR / transcript_filename)
+    return create_chunks(segments, Path(transcript_filename).stem)
+
+
 def load_existing_index() -> Tuple[faiss.Index, List[Dict], set]:
     """Load existing FAISS index and metadata if available."""
     index_path = INDEX_DIR / "faiss.index"
@@ -131,6 +148,70 @@ def load_existing_index() -> Tuple[faiss.Index, List[Dict], set]:
     return None, [], set()
 
 
+def build_hnsw_index(embeddings: np.ndarray) -> faiss.Index:
+    """
+    Build an HNSW index over L2-normalized embeddings (cosine similarity).
+
+    Graph search is sub-linear, unlike the exhaustive IndexFlatIP scan, and
+    vectors are stored as 8-bit scalar codes: 4x less memory than float32.
+    """
+    dimension = embeddings.shape[1]
+    print(f"\nCreating new FAISS HNSW index (dimension={dimension})...")
+    index = faiss.IndexHNSWSQ(
+        dimension, faiss.ScalarQuantizer.QT_8bit_uniform, HNSW_M, faiss.METRIC_INNER_PRODUCT
+    )
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    
+    # Fix the quantizer range to [-1, 1], which covers every component of
+    # a unit vector. A range learned from this batch would clip vectors
+    # added by later incremental runs.
+    index.train(np.array([[-1.0] * dimension, [1.0] * dimension], dtype=np.float32))
+    index.add(embeddings)
+    return index
+
+
+def save_index(index: faiss.Index, all_metadata: List[Dict]):
+    """Write the index, its metadata and statistics to INDEX_DIR."""
+    # Both files are written to a temporary name and swapped in with
+    # os.replace, so a running server (which reloads them when their mtime
+    # changes) never reads a half-written file. Metadata goes first: for an
+    # append-only update, the old index alongside the new metadata never
+    # returns ids that the metadata doesn't have.
+    print(f"\nSaving index to '{INDEX_DIR}'...")
+    metadata_tmp = INDEX_DIR / "metadata.json.tmp"
+    with open(metadata_tmp, 'w', encoding='utf-8') as f:
+        # Metadata is machine-read on every index load, so write it compactly
+        json.dump(all_metadata, f, separators=(',', ':'))
+    
+    index_tmp = INDEX_DIR / "faiss.index.tmp"
+    faiss.write_index(index, str(index_tmp))
+    
+    os.replace(metadata_tmp, INDEX_DIR / "metadata.json")
+    os.replace(index_tmp, INDEX_DIR / "faiss.index")
+    
+    # Save index statistics
+    stats = {
+        'total_videos': len(set(m['video_name'] for m in all_metadata)),
+        'total_chunks': len(all_metadata),
+        'embedding_dimension': index.d,
+        'index_type': type(index).__name__,
+        'model_name': MODEL_NAME,
+        'chunk_size': CHUNK_SIZE,
+        'overlap': OVERLAP
+    }
+    
+    with open(INDEX_DIR / "stats.json", 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2)
+    
+    print("\n" + "="*60)
+    print("Indexing complete!")
+    print("="*60)
+    print(f"Total videos indexed: {stats['total_videos']}")
+    print(f"Total searchable chunks: {stats['total_chunks']}")
+    print(f"Average chunks per video: {stats['total_chunks'] / stats['total_videos']:.1f}")
+    print("="*60)
+
+
 def create_search_index(incremental: bool = True):
     """
     Create or update the search index with FAISS for efficient retrieval.
@@ -138,10 +219,6 @@ def create_search_index(incremental: bool = True):
     Args:
         incremental: If True, only index new videos. If False, rebuild entire index.
     """
-    print(f"Loading sentence transformer model: '{MODEL_NAME}'...")
-    model = SentenceTransformer(MODEL_NAME)
-    print("Model loaded successfully.")
-    
     # Create index directory
     INDEX_DIR.mkdir(exist_ok=True, parents=True)
     
@@ -157,6 +234,15 @@ def create_search_index(incremental: bool = True):
         existing_metadata = []
         indexed_videos = set()
     
+    # An index built before the switch to HNSW is a flat index, and appending
+    # to it would keep it flat forever. Rebuild it as HNSW from its own stored
+    # vectors (already normalized), so no re-encoding is needed.
+    upgraded = False
+    if existing_index is not None and not isinstance(existing_index, faiss.IndexHNSW):
+        print(f"Upgrading existing {type(existing_index).__name__} index to HNSW...")
+        existing_index = build_hnsw_index(existing_index.reconstruct_n(0, existing_index.ntotal))
+        upgraded = True
+    
     # Get all transcript files
     transcript_files = [f for f in os.listdir(TRANSCRIPT_DIR) if f.endswith('.txt')]
     
@@ -169,6 +255,8 @@ def create_search_index(incremental: bool = True):
         new_files = [f for f in transcript_files if Path(f).stem not in indexed_videos]
         if not new_files:
             print("No new videos to index.")
+            if upgraded:
+                save_index(existing_index, existing_metadata)
             return
         print(f"Found {len(new_files)} new videos to index (out of {len(transcript_files)} total).")
         transcript_files = new_files
@@ -176,21 +264,18 @@ def create_search_index(incremental: bool = True):
         print(f"Found {len(transcript_files)} videos to index.")
     
     # Process transcripts into chunks
+    # Kept serial: parsing a transcript takes milliseconds, and this runs
+    # inside the multithreaded web server, where a process pool would fork a
+    # threaded process (or re-import the model stack in every worker)
     all_chunks = []
     
     for transcript_filename in tqdm(transcript_files, desc="Processing transcripts"):
-        video_name = Path(transcript_filename).stem
-        transcript_path = TRANSCRIPT_DIR / transcript_filename
+        chunks = process_transcript(transcript_filename)
         
-        # Parse transcript
-        segments = parse_transcript(transcript_path)
-        
-        if not segments:
-            print(f"  - WARNING: No segments found in '{transcript_filename}'")
+        if not chunks:
+            print(f"  - WARNING: No chunks created from '{transcript_filename}'")
             continue
         
-        # Create chunks from segments
-        chunks = create_chunks(segments, video_name)
         all_chunks.extend(chunks)
     
     if not all_chunks:
@@ -201,59 +286,33 @@ def create_search_index(incremental: bool = True):
     print(f"Average chunk size: {sum(len(c['text']) for c in all_chunks) / len(all_chunks):.1f} characters")
     
     # Generate embeddings
+    # The model is only loaded once there is something to encode
+    print(f"\nLoading sentence transformer model: '{MODEL_NAME}'...")
+    model = get_model()
+    print("Model loaded successfully.")
+    
     print("\nGenerating embeddings...")
     texts = [chunk['text'] for chunk in all_chunks]
-    embeddings = model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
+    embeddings = model.encode(
+        texts, batch_size=ENCODE_BATCH_SIZE, show_progress_bar=True, convert_to_numpy=True
+    )
     
-    # Create or update FAISS index
-    dimension = embeddings.shape[1]  # 384 for all-MiniLM-L6-v2
+    # Normalize embeddings for cosine similarity
+    faiss.normalize_L2(embeddings)
     
+    # Create or update FAISS index
     if existing_index is None:
-        # Create new index with cosine similarity
-        print(f"\nCreating new FAISS index (dimension={dimension})...")
-        index = faiss.IndexFlatIP(dimension)  # Inner product for normalized vectors
-        
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(embeddings)
-        index.add(embeddings)
-        
+        index = build_hnsw_index(embeddings)
         all_metadata = all_chunks
     else:
         # Add to existing index
         print(f"\nUpdating existing index (adding {len(embeddings)} new vectors)...")
-        faiss.normalize_L2(embeddings)
         existing_index.add(embeddings)
         
         index = existing_index
         all_metadata = existing_metadata + all_chunks
     
-    # Save index and metadata
-    print(f"\nSaving index to '{INDEX_DIR}'...")
-    faiss.write_index(index, str(INDEX_DIR / "faiss.index"))
-    
-    with open(INDEX_DIR / "metadata.json", 'w', encoding='utf-8') as f:
-        json.dump(all_metadata, f, indent=2)
-    
-    # Save index statistics
-    stats = {
-        'total_videos': len(set(m['video_name'] for m in all_metadata)),
-        'total_chunks': len(all_metadata),
-        'embedding_dimension': dimension,
-        'model_name': MODEL_NAME,
-        'chunk_size': CHUNK_SIZE,
-        'overlap': OVERLAP
-    }
-    
-    with open(INDEX_DIR / "stats.json", 'w', encoding='utf-8') as f:
-        json.dump(stats, f, indent=2)
-    
-    print("\n" + "="*60)
-    print("Indexing complete!")
-    print("="*60)
-    print(f"Total videos indexed: {stats['total_videos']}")
-    print(f"Total searchable chunks: {stats['total_chunks']}")
-    print(f"Average chunks per video: {stats['total_chunks'] / stats['total_videos']:.1f}")
-    print("="*60)
+    save_index(index, all_metadata)
 
 
 if __name__ == "__main__":
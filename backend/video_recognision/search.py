@@ -12,37 +12,138 @@ Improvements over v1:
 
 import json
 import argparse
+import urllib.parse
+import urllib.request
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Optional
-import faiss
+from typing import List, Dict, Optional, Tuple
+
+# sentence_transformers (which pulls in torch) and faiss are imported inside
+# the functions that need them, so a CLI call answered by a running backend
+# (--server) never pays their import cost
 
 # --- Configuration ---
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 INDEX_DIR = BACKEND_DIR / "video_recognision" / "search_index_v2"
+INDEX_PATH = INDEX_DIR / "faiss.index"
+METADATA_PATH = INDEX_DIR / "metadata.json"
 VIDEO_DIR = BACKEND_DIR / "videos"
 MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+# Run the transformer on ONNX Runtime (fused kernels, no autograd overhead).
+# indexer.py loads the model through get_model() too, so embeddings stay comparable.
+MODEL_BACKEND = 'onnx'
+
+# Number of recent query embeddings kept in memory (~1.5 KB each)
+QUERY_CACHE_SIZE = 1024
+
+# Minimum HNSW search depth (only used when the index is an HNSW graph)
+HNSW_EF_SEARCH = 64
+
+# Optional re-ranking: over-fetch candidates from the index, then re-order
+# them with a cross-encoder that reads the query and chunk text together.
+# Off by default: it loads a second model and adds a forward pass per search.
+RERANK_MODEL_NAME = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+RERANK_OVERFETCH = 5     # Candidates fetched per requested result
+RERANK_BATCH_SIZE = 64
+
+# Seconds the CLI waits on a running backend before searching locally
+SERVER_TIMEOUT = 10
 
 # Cache the model globally to avoid reloading
 _MODEL_CACHE = None
 
+# Cache the re-rank model separately; it is only loaded when asked for
+_RERANKER_CACHE = None
+
+# Cache the index and metadata together as ((index mtime, metadata mtime),
+# index, metadata) so a re-index is picked up and the two always match
+_INDEX_CACHE = None
+
 
 def get_model():
     """Get or load the sentence transformer model (cached)."""
     global _MODEL_CACHE
     if _MODEL_CACHE is None:
         print("Loading search model...")
-        _MODEL_CACHE = SentenceTransformer(MODEL_NAME)
+        from sentence_transformers import SentenceTransformer
+        _MODEL_CACHE = SentenceTransformer(MODEL_NAME, backend=MODEL_BACKEND)
     return _MODEL_CACHE
 
 
-def search(
+def get_reranker():
+    """Get or load the cross-encoder re-rank model (cached)."""
+    global _RERANKER_CACHE
+    if _RERANKER_CACHE is None:
+        print("Loading re-rank model...")
+        from sentence_transformers import CrossEncoder
+        _RERANKER_CACHE = CrossEncoder(RERANK_MODEL_NAME)
+    return _RERANKER_CACHE
+
+
+def get_index_and_metadata() -> Tuple["faiss.Index", List[Dict]]:
+    """
+    Get or load the FAISS index and its chunk metadata (cached).
+
+    Both files are reloaded together when either one changes, so a search
+    never pairs a new index with old metadata (or vice versa).
+    """
+    import faiss
+    global _INDEX_CACHE
+    mtimes = (INDEX_PATH.stat().st_mtime_ns, METADATA_PATH.stat().st_mtime_ns)
+    if _INDEX_CACHE is None or _INDEX_CACHE[0] != mtimes:
+        index = faiss.read_index(str(INDEX_PATH))
+        with open(METADATA_PATH, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+
+        # The indexer swaps the two files in one after the other; if we read
+        # in between, keep serving the previous matching pair and retry on
+        # the next call
+        if index.ntotal != len(metadata) and _INDEX_CACHE is not None:
+            return _INDEX_CACHE[1], _INDEX_CACHE[2]
+
+        _INDEX_CACHE = (mtimes, index, metadata)
+    return _INDEX_CACHE[1], _INDEX_CACHE[2]
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def encode_query(query: str) -> np.ndarray:
+    """Embed a query as a (1, dim) float32 unit vector (cached per query string)."""
+    # Normalized in the encoder for cosine similarity
+    query_embedding = get_model().encode([query], convert_to_numpy=True, normalize_embeddings=True)
+    # FAISS needs C-contiguous float32 (no-op copy when it already is)
+    query_embedding = np.ascontiguousarray(query_embedding, dtype=np.float32)
+    # Every caller shares the cached array, so make numpy reject in-place
+    # edits that would corrupt the cache entry. FAISS's own in-place helpers
+    # (e.g. faiss.normalize_L2) bypass this flag: never pass it to them.
+    query_embedding.flags.writeable = False
+    return query_embedding
+
+
+def load_resources():
+    """
+    Get the model, index and metadata.
+
+    On a cold start the index and metadata are read from disk on a
+    background thread while the model loads, instead of one after the other.
+    """
+    if _MODEL_CACHE is not None:
+        return (get_model(), *get_index_and_metadata())
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        index_future = pool.submit(get_index_and_metadata)
+        model = get_model()
+        return (model, *index_future.result())
+
+
+def search_results(
     query: str,
     top_k: int = 10,
     video_filter: Optional[str] = None,
-    min_score: float = 0.0
-) -> str:
+    min_score: float = 0.0,
+    rerank: bool = False
+) -> Dict:
     """
     Perform semantic search on video transcripts.
     
@@ -51,75 +152,106 @@ def search(
         top_k: Number of results to return
         video_filter: Optional video name to filter results
         min_score: Minimum similarity score threshold (0-1)
+        rerank: Re-order an over-fetched candidate set with a cross-encoder
+                (slower; min_score still applies to the similarity score)
     
     Returns:
-        JSON string with search results
+        Dict with search results (use search() for a JSON string)
     """
     # Check if index exists
-    index_path = INDEX_DIR / "faiss.index"
-    metadata_path = INDEX_DIR / "metadata.json"
-    
-    if not index_path.exists() or not metadata_path.exists():
-        return json.dumps({
+    if not INDEX_PATH.exists() or not METADATA_PATH.exists():
+        return {
             "error": "Search index not found.",
             "message": "Please run 'indexer_v2.py' first to build the search index.",
             "hint": "Run: python backend/video_recognision/indexer_v2.py"
-        }, indent=4)
-    
-    # Load index and metadata
-    model = get_model()
-    index = faiss.read_index(str(index_path))
+        }
     
-    with open(metadata_path, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
+    import faiss
+
+    # Load model, index and metadata (cached across calls)
+    _, index, metadata = load_resources()
     
-    # Generate query embedding
-    query_embedding = model.encode([query], convert_to_numpy=True)
-    faiss.normalize_L2(query_embedding)  # Normalize for cosine similarity
+    # Generate query embedding (repeated queries skip the encoder)
+    query_embedding = encode_query(query)
     
     # Search with FAISS (get more results than needed for filtering)
-    search_k = min(top_k * 3, len(metadata))  # Get 3x results for filtering
-    distances, indices = index.search(query_embedding, search_k)
+    # Get 3x results for filtering, or more to give the re-ranker candidates
+    search_k = min(top_k * (RERANK_OVERFETCH if rerank else 3), len(metadata))
+    # HNSW search depth is passed per call rather than set on the shared
+    # cached index, so concurrent requests can't race on it (and must be at
+    # least search_k, or HNSW returns fewer than search_k hits)
+    params = None
+    if isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(efSearch=max(HNSW_EF_SEARCH, top_k * 4, search_k))
+    distances, indices = index.search(query_embedding, search_k, params=params)
     
     # Process results
     results = []
     seen_videos = set()
-    
-    for idx, score in zip(indices[0], distances[0]):
-        if idx == -1:  # FAISS returns -1 for missing results
-            continue
-            
+
+    # Lowercase the query terms once rather than per candidate
+    query_lower = query.lower()
+    filter_lower = video_filter.lower() if video_filter else None
+
+    # Convert the result rows to Python lists in one C-level pass, instead of
+    # boxing a numpy scalar for every id/score the loop touches
+    hits = [
+        (idx, score, None)
+        for idx, score in zip(indices[0].tolist(), distances[0].tolist())
+        if idx != -1  # FAISS returns -1 for missing results
+    ]
+
+    if rerank and hits:
+        # Score all (query, chunk) pairs in batched forward passes, then walk
+        # the candidates in cross-encoder order
+        rerank_scores = get_reranker().predict(
+            [(query, metadata[idx]['text']) for idx, _, _ in hits],
+            batch_size=RERANK_BATCH_SIZE
+        )
+        hits = sorted(
+            ((idx, score, rerank_score)
+             for (idx, score, _), rerank_score in zip(hits, rerank_scores.tolist())),
+            key=lambda hit: hit[2],
+            reverse=True
+        )
+
+    for idx, score, rerank_score in hits:
         meta = metadata[idx]
-        
-        # Apply filters
-        if video_filter and video_filter.lower() not in meta['video_name'].lower():
+        video_name = meta['video_name']
+
+        # Grouping: Only show the highest scoring segment per video
+        if video_name in seen_videos:
             continue
-        
+
         if score < min_score:
             continue
-        
+
+        # Apply filters
+        name_lower = video_name.lower()
+        if filter_lower and filter_lower not in name_lower:
+            continue
+
         # Title Boosting: Increase score if query is in video title
         boost_factor = 1.0
-        if query.lower() in meta['video_name'].lower():
+        if query_lower in name_lower:
             boost_factor = 1.2  # 20% boost for title match
             
         final_score = score * boost_factor
 
-        # Grouping: Only show the highest scoring segment per video
-        if meta['video_name'] in seen_videos:
-            continue
-            
-        seen_videos.add(meta['video_name'])
+        seen_videos.add(video_name)
 
-        results.append({
-            "video_name": meta['video_name'],
+        result = {
+            "video_name": video_name,
             "timestamp": f"{meta['start_time']} --> {meta['end_time']}",
             "start_seconds": meta['start_seconds'],
             "end_seconds": meta['end_seconds'],
             "text": meta['text'],
-            "similarity_score": round(float(final_score), 4),
+            "similarity_score": round(final_score, 4),
             "duration_seconds": round(meta['end_seconds'] - meta['start_seconds'], 2)
-        })
+        }
+        if rerank_score is not None:
+            result["rerank_score"] = round(rerank_score, 4)
+        results.append(result)
         
         # Stop if we have enough results
         if len(results) >= top_k:
@@ -133,7 +265,48 @@ def search(
         "results": results
     }
     
-    return json.dumps(response, indent=4)
+    return response
+
+
+def search(
+    query: str,
+    top_k: int = 10,
+    video_filter: Optional[str] = None,
+    min_score: float = 0.0,
+    rerank: bool = False
+) -> str:
+    """
+    Perform semantic search on video transcripts.
+
+    Returns:
+        JSON string with search results (see search_results())
+    """
+    return json.dumps(search_results(query, top_k, video_filter, min_score, rerank), indent=4)
+
+
+def search_via_server(
+    server_url: str,
+    query: str,
+    top_k: int = 10,
+    video_filter: Optional[str] = None,
+    min_score: float = 0.0,
+    rerank: bool = False
+) -> str:
+    """
+    Run a search against an already running backend (FastAPI /search_video).
+
+    The server keeps the model and index loaded, so a CLI call skips the
+    multi-second model load and only pays for encoding the query.
+    """
+    params = {"query": query, "top_k": top_k, "min_score": min_score}
+    if video_filter:
+        params["video"] = video_filter
+    if rerank:
+        params["rerank"] = "true"
+    url = f"{server_url.rstrip('/')}/search_video?{urllib.parse.urlencode(params)}"
+
+    with urllib.request.urlopen(url, timeout=SERVER_TIMEOUT) as response:
+        return json.dumps(json.load(response), indent=4)
 
 
 def get_index_stats() -> str:
@@ -179,6 +352,17 @@ if __name__ == "__main__":
         default=0.0,
         help="Minimum similarity score (0-1, default: 0.0)"
     )
+    parser.add_argument(
+        "--rerank",
+        action='store_true',
+        help=f"Re-rank candidates with a cross-encoder ({RERANK_MODEL_NAME}); slower"
+    )
+    parser.add_argument(
+        "--server",
+        type=str,
+        help="URL of a running backend to query (e.g. http://localhost:8000); "
+             "falls back to a local search if it is unreachable"
+    )
     parser.add_argument(
         "--stats",
         action='store_true',
@@ -190,12 +374,29 @@ if __name__ == "__main__":
     if args.stats:
         print(get_index_stats())
     elif args.query:
-        result = search(
-            query=args.query,
-            top_k=args.top_k,
-            video_filter=args.video,
-            min_score=args.min_score
-        )
+        result = None
+        if args.server:
+            try:
+                result = search_via_server(
+                    args.server,
+                    query=args.query,
+                    top_k=args.top_k,
+                    video_filter=args.video,
+                    min_score=args.min_score,
+                    rerank=args.rerank
+                )
+            except (OSError, ValueError) as e:
+                # OSError covers URLError, timeouts and dropped connections;
+                # ValueError covers a response that isn't valid JSON
+                print(f"Server unavailable ({e}), searching locally...")
+        if result is None:
+            result = search(
+                query=args.query,
+                top_k=args.top_k,
+                video_filter=args.video,
+                min_score=args.min_score,
+                rerank=args.rerank
+            )
         print(result)
     else:
         parser.print_help()
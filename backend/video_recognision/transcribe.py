@@ -1,6 +1,11 @@
 import os
-import whisper
-from moviepy.editor import VideoFileClip
+import subprocess
+import ctranslate2
+import numpy as np
+from collections import deque
+from itertools import islice
+from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from tqdm import tqdm
 
@@ -16,47 +21,100 @@ VIDEO_DIR = BACKEND_DIR / "videos"
 # Define the directory where the transcriptions will be saved
 TRANSCRIPT_DIR = BACKEND_DIR / "video_recognision" / "transcripts"
 
-# Define the directory for temporary audio files
-TEMP_AUDIO_DIR = BACKEND_DIR / "video_recognision" / "temp_audio"
-
 # Choose the Whisper model size.
 # Options: "tiny", "base", "small", "medium", "large"
 # "small" provides better accuracy for Hindi/multilingual transcription
 MODEL_NAME = "small"
 
+# CTranslate2 weight precision. int8 quantization is ~4x faster than the
+# reference PyTorch Whisper on CPU at the same accuracy. On a CUDA GPU the
+# int8 weights are combined with float16 activations to use Tensor Cores.
+CPU_COMPUTE_TYPE = "int8"
+CUDA_COMPUTE_TYPE = "int8_float16"
+
+# Number of VAD-split speech chunks Whisper decodes together per forward pass
+TRANSCRIBE_BATCH_SIZE = 16
+
+# Sample rate Whisper expects its input audio at
+AUDIO_SAMPLE_RATE = 16000
 
-def format_timestamp(seconds: float) -> str:
-    """Converts a time in seconds to a human-readable HH:MM:SS.mmm format."""
-    assert seconds >= 0, "non-negative timestamp expected"
-    milliseconds = round(seconds * 1000.0)
+# Number of videos whose audio is decoded ahead while Whisper transcribes.
+# Decoding is ffmpeg work, so it overlaps with transcription; the bound
+# keeps at most this many decoded tracks waiting in memory.
+AUDIO_WORKERS = 2
 
-    hours = milliseconds // 3_600_000
-    milliseconds %= 3_600_000
+# Segments are written to disk in blocks of this size as the decoder emits
+# them, rather than after the whole video has been transcribed
+SEGMENT_WRITE_BLOCK = 32
 
-    minutes = milliseconds // 60_000
-    milliseconds %= 60_000
 
-    seconds = milliseconds // 1_000
-    milliseconds %= 1_000
+def get_compute_type() -> str:
+    """Picks the CTranslate2 compute type for the device Whisper will run on."""
+    if ctranslate2.get_cuda_device_count() > 0:
+        return CUDA_COMPUTE_TYPE
+    return CPU_COMPUTE_TYPE
 
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+def format_timestamps(seconds: np.ndarray) -> np.ndarray:
+    """
+    Converts times in seconds to human-readable HH:MM:SS.mmm strings.
+
+    Vectorized: the hour/minute/second split is done with numpy over the
+    whole array, leaving only the string formatting per value.
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    assert (seconds >= 0).all(), "non-negative timestamps expected"
+    milliseconds = np.round(seconds * 1000.0).astype(np.int64)
+
+    hours, milliseconds = np.divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = np.divmod(milliseconds, 60_000)
+    secs, milliseconds = np.divmod(milliseconds, 1_000)
+
+    formatted = [
+        f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+        for h, m, s, ms in zip(
+            hours.ravel().tolist(), minutes.ravel().tolist(),
+            secs.ravel().tolist(), milliseconds.ravel().tolist()
+        )
+    ]
+    return np.array(formatted, dtype=object).reshape(seconds.shape)
+
+
+def extract_audio(video_path: Path) -> np.ndarray:
+    """Decodes the audio track of a video into a 16 kHz mono float32 array."""
+    try:
+        # Pipe raw PCM out of ffmpeg: no video frames are decoded and no
+        # intermediate audio file is written and decoded again.
+        result = subprocess.run(
+            ['ffmpeg', '-nostdin', '-i', str(video_path), '-vn', '-ac', '1',
+             '-ar', str(AUDIO_SAMPLE_RATE), '-f', 'f32le', '-'],
+            check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        return np.frombuffer(result.stdout, dtype=np.float32)
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        # Fall back to faster-whisper's bundled decoder (e.g. no ffmpeg binary on PATH)
+        return decode_audio(str(video_path), sampling_rate=AUDIO_SAMPLE_RATE)
 
 
 def transcribe_videos():
     """
-    Extracts audio from videos, transcribes it using the local Whisper model,
-    and saves the transcriptions with timestamps.
+    Extracts audio from videos, transcribes it using the local Whisper model
+    (faster-whisper / CTranslate2), and saves the transcriptions with timestamps.
     """
-    print(f"Loading Whisper model: '{MODEL_NAME}'...")
+    compute_type = get_compute_type()
+    print(f"Loading Whisper model: '{MODEL_NAME}' ({compute_type})...")
     # This loads the specified Whisper model. The first time a model is used,
     # it will be downloaded automatically and run locally from then on.
-    model = whisper.load_model(MODEL_NAME)
+    # The batched pipeline splits the audio on speech activity (VAD) and
+    # transcribes the chunks in parallel batches instead of one 30s window at a time.
+    model = BatchedInferencePipeline(
+        model=WhisperModel(MODEL_NAME, device="auto", compute_type=compute_type)
+    )
     print("Model loaded successfully.")
 
     # --- Directory Setup ---
-    # Ensure the output and temporary directories exist.
+    # Ensure the output directory exists.
     TRANSCRIPT_DIR.mkdir(exist_ok=True)
-    TEMP_AUDIO_DIR.mkdir(exist_ok=True)
     print(f"Videos will be read from: {VIDEO_DIR}")
     print(f"Transcripts will be saved to: {TRANSCRIPT_DIR}")
 
@@ -73,64 +131,82 @@ def transcribe_videos():
 
     print(f"Found {len(video_files)} video(s) to process.")
 
-    # Process each video file with a progress bar.
-    for video_filename in tqdm(video_files, desc="Transcribing Videos"):
-        video_path = VIDEO_DIR / video_filename
-        video_name = Path(video_filename).stem
-        transcript_path = TRANSCRIPT_DIR / f"{video_name}.txt"
-        temp_audio_path = TEMP_AUDIO_DIR / f"{video_name}.mp3"
-
-        # --- Skip if Already Processed ---
-        if transcript_path.exists():
+    # --- Skip if Already Processed ---
+    pending_files = []
+    for video_filename in video_files:
+        if (TRANSCRIPT_DIR / f"{Path(video_filename).stem}.txt").exists():
             print(f"Skipping '{video_filename}', transcript already exists.")
-            continue
-
-        try:
-            # --- Audio Extraction ---
-            print(f"\nProcessing '{video_filename}'...")
-            video_clip = VideoFileClip(str(video_path))
-            print("Extracting audio...")
-            video_clip.audio.write_audiofile(str(temp_audio_path), codec='mp3', logger=None)
-            video_clip.close()
-
-            # --- Transcription ---
-            print("Transcribing audio with Whisper...")
-            # The result object contains detailed segments with timestamps.
-            # Force Hindi language to get Devanagari script (not Urdu)
-            result = model.transcribe(str(temp_audio_path), fp16=False, language="hi")
-
-            # --- Save Transcription with Timestamps ---
-            print(f"Saving transcript with timestamps to '{transcript_path}'...")
-            with open(transcript_path, 'w', encoding='utf-8') as f:
-                # The result['segments'] is a list of dictionaries,
-                # each containing the start time, end time, and text of a segment.
-                for segment in result['segments']:
-                    start_time = segment['start']
-                    end_time = segment['end']
-                    text = segment['text']
-
-                    # Format the timestamps into a human-readable format
-                    start_formatted = format_timestamp(start_time)
-                    end_formatted = format_timestamp(end_time)
-
-                    # Write the formatted line to the file
-                    f.write(f"[{start_formatted} --> {end_formatted}] {text.strip()}\n")
-
-            print(f"Successfully transcribed '{video_filename}'.")
-
-        except Exception as e:
-            print(f"An error occurred while processing '{video_filename}': {e}")
-
-        finally:
-            # --- Cleanup ---
-            # Clean up the temporary audio file after processing.
-            if os.path.exists(temp_audio_path):
-                os.remove(temp_audio_path)
+        else:
+            pending_files.append(video_filename)
+
+    # Audio is decoded in background threads so that the next videos' audio
+    # is ready by the time Whisper finishes the current one.
+    with ThreadPoolExecutor(max_workers=AUDIO_WORKERS) as executor:
+        audio_futures = deque(
+            executor.submit(extract_audio, VIDEO_DIR / video_filename)
+            for video_filename in pending_files[:AUDIO_WORKERS]
+        )
+
+        # Process each video file with a progress bar.
+        for i, video_filename in enumerate(tqdm(pending_files, desc="Transcribing Videos")):
+            video_name = Path(video_filename).stem
+            transcript_path = TRANSCRIPT_DIR / f"{video_name}.txt"
+            partial_path = transcript_path.with_suffix('.txt.part')
+
+            # Keep the decode queue AUDIO_WORKERS videos ahead
+            audio_future = audio_futures.popleft()
+            next_index = i + AUDIO_WORKERS
+            if next_index < len(pending_files):
+                audio_futures.append(
+                    executor.submit(extract_audio, VIDEO_DIR / pending_files[next_index])
+                )
+
+            try:
+                # --- Audio Extraction ---
+                print(f"\nProcessing '{video_filename}'...")
+                print("Waiting for extracted audio...")
+                audio = audio_future.result()
+
+                # --- Transcription ---
+                print("Transcribing audio with Whisper...")
+                # Segments are produced lazily as the decoder works through the audio.
+                # Force Hindi language to get Devanagari script (not Urdu)
+                # The batched pipeline defaults to without_timestamps=True, which
+                # yields one segment per merged VAD chunk (up to 30s). Keep
+                # Whisper's utterance-level segments so search hits stay seekable.
+                segments, _ = model.transcribe(
+                    audio, language="hi", batch_size=TRANSCRIBE_BATCH_SIZE,
+                    without_timestamps=False
+                )
+
+                # --- Save Transcription with Timestamps ---
+                # Write segments out in blocks as they are decoded, so progress
+                # is visible on disk during long videos. The transcript goes to
+                # a .part file first and is renamed once complete, so a crash
+                # never leaves a truncated transcript that would be skipped.
+                print(f"Saving transcript with timestamps to '{transcript_path}'...")
+                with open(partial_path, 'w', encoding='utf-8') as f:
+                    while block := list(islice(segments, SEGMENT_WRITE_BLOCK)):
+                        # Format the block's timestamps in one vectorized pass
+                        timestamps = format_timestamps(
+                            np.array([(segment.start, segment.end) for segment in block])
+                        )
+                        # Each segment carries the start time, end time, and text.
+                        f.writelines(
+                            f"[{start_formatted} --> {end_formatted}] {segment.text.strip()}\n"
+                            for segment, (start_formatted, end_formatted) in zip(block, timestamps)
+                        )
+                        f.flush()
+                partial_path.replace(transcript_path)
+
+                print(f"Successfully transcribed '{video_filename}'.")
+
+            except Exception as e:
+                print(f"An error occurred while processing '{video_filename}': {e}")
+                # Don't leave a partial transcript behind
+                partial_path.unlink(missing_ok=True)
 
     print("\nAll videos have been processed.")
-    # Optional: Clean up the temp audio directory if it's empty
-    if not os.listdir(TEMP_AUDIO_DIR):
-        os.rmdir(TEMP_AUDIO_DIR)
 
 
 if __name__ == "__main__":